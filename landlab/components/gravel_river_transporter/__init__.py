@@ -0,0 +1,4 @@
+from .gravel_river_transporter import GravelRiverTransporter
+
+
+__all__ = ["GravelRiverTransporter"]
@@ -0,0 +1,33 @@
+import numpy as np
+
+cimport cython
+cimport numpy as np
+
+DTYPE_FLOAT = np.double
+ctypedef np.double_t DTYPE_FLOAT_t
+
+DTYPE_INT = int
+ctypedef np.int_t DTYPE_INT_t
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def accumulate_influx(np.ndarray[DTYPE_INT_t, ndim=1] node_order,
+                      np.ndarray[DTYPE_INT_t, ndim=1] flow_receivers,
+                      np.ndarray[DTYPE_FLOAT_t, ndim=1] outflux,
+                      np.ndarray[DTYPE_FLOAT_t, ndim=1] influx):
+    """Sum each node's bedload outflux into its flow receiver.
+
+    Traverses the downstream-to-upstream node order from the top of the
+    network down, so nodes with several donors collect every
+    contribution. The influx array must be zeroed by the caller; nodes
+    that are their own receiver (outlets and sinks) are skipped.
+    """
+    cdef int n_nodes = node_order.shape[0]
+    cdef int k, node, rcvr
+
+    for k in range(n_nodes - 1, -1, -1):
+        node = node_order[k]
+        rcvr = flow_receivers[node]
+        if rcvr != node:
+            influx[rcvr] = influx[rcvr] + outflux[node]
@@ -0,0 +1,103 @@
+import numpy as np
+
+cimport cython
+cimport numpy as np
+
+DTYPE_FLOAT = np.double
+ctypedef np.double_t DTYPE_FLOAT_t
+
+DTYPE_INT = int
+ctypedef np.int_t DTYPE_INT_t
+
+DTYPE_INT32 = np.int32
+ctypedef np.int32_t DTYPE_INT32_t
+
+DTYPE_UINT8 = np.uint8
+ctypedef np.uint8_t DTYPE_UINT8_t
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def fill_matrix_coo(np.ndarray[DTYPE_INT_t, ndim=1] core_nodes,
+                    np.ndarray[DTYPE_INT_t, ndim=1] receiver_of_core,
+                    np.ndarray[DTYPE_INT32_t, ndim=1] mat_id,
+                    np.ndarray[DTYPE_UINT8_t, ndim=1] status_at_node,
+                    DTYPE_UINT8_t core_status,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] transport_coef,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] core_elev,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] elev,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] abrasion,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] inv_cell_area,
+                    DTYPE_FLOAT_t porosity_dt,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] data,
+                    np.ndarray[DTYPE_INT32_t, ndim=1] rows,
+                    np.ndarray[DTYPE_INT32_t, ndim=1] cols,
+                    np.ndarray[DTYPE_FLOAT_t, ndim=1] rhs):
+    """Fill the COO coupling blocks and right-hand side for the implicit
+    gravel-transport solver.
+
+    The buffer layout matches
+    ``GravelRiverTransporter._setup_matrix_solver``: a unit diagonal block
+    of length n_core (prefilled once, untouched here) followed by four
+    coupling blocks of length n_core each. Duplicates are summed when the
+    caller converts the triplets to compressed sparse form.
+
+    ``transport_coef`` holds the lagged coefficient
+    f = kQ I Q S**(1/6) / L at each core node, precomputed by the caller
+    because it does not depend on the time step.
+    """
+    # define internal variables
+    cdef int n_core = core_nodes.shape[0]
+    cdef int j, i, r, rj
+    cdef int b1, b2, b3, b4
+    cdef double f, p, pf, prf
+
+    for j in range(n_core):
+        i = core_nodes[j]
+        r = receiver_of_core[j]
+
+        # lagged transport coefficient and timestep prefactor
+        f = transport_coef[j]
+        p = porosity_dt * inv_cell_area[j]
+        pf = p * f
+
+        b1 = n_core + j
+        b2 = 2 * n_core + j
+        b3 = 3 * n_core + j
+        b4 = 4 * n_core + j
+
+        # outflux from node i: row j, column j
+        rows[b1] = j
+        cols[b1] = j
+        data[b1] = pf
+
+        # explicit abrasion loss goes to the right-hand side
+        rhs[j] = core_elev[j] - porosity_dt * abrasion[i]
+
+        if status_at_node[r] == core_status:
+            # outflux from i lowers r's side of the slope, and shows up as
+            # influx in r's own mass balance
+            rj = mat_id[r]
+            rows[b2] = j
+            cols[b2] = rj
+            data[b2] = -pf
+            prf = porosity_dt * inv_cell_area[rj] * f
+            rows[b3] = rj
+            cols[b3] = rj
+            data[b3] = prf
+            rows[b4] = rj
+            cols[b4] = j
+            data[b4] = -prf
+        else:
+            # flux to a fixed-elevation boundary goes to the right-hand
+            # side instead; park the unused slots on the diagonal as zeros
+            rhs[j] = rhs[j] + pf * elev[r]
+            rows[b2] = j
+            cols[b2] = j
+            data[b2] = 0.0
+            rows[b3] = j
+            cols[b3] = j
+            data[b3] = 0.0
+            rows[b4] = j
+            cols[b4] = j
+            data[b4] = 0.0
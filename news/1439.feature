@@ -0,0 +1,3 @@
+Added a new component, ``GravelRiverTransporter``, that models transport and
+abrasion of gravel-sized sediment in a network of rivers, with a choice of an
+explicit or an implicit (sparse-matrix) solver.
@@ -0,0 +1,200 @@
+#! /usr/bin/env python
+"""
+Unit tests for landlab.components.gravel_river_transporter
+"""
+import numpy as np
+from numpy.testing import assert_allclose, assert_raises
+
+from landlab import RasterModelGrid
+from landlab.components import FlowAccumulator, GravelRiverTransporter
+
+
+def make_one_node_grid(solver="explicit", **kwds):
+    """Set up a 3x3 grid with a single core node draining to a boundary."""
+    grid = RasterModelGrid((3, 3), xy_spacing=1000.0)
+    elev = grid.add_zeros("topographic__elevation", at="node")
+    elev[4] = 1000.0
+    fa = FlowAccumulator(grid)
+    fa.run_one_step()
+    transporter = GravelRiverTransporter(grid, solver=solver, **kwds)
+    return grid, transporter
+
+
+def test_transport_capacity():
+    grid, transporter = make_one_node_grid()
+    transporter.calc_transport_capacity()
+
+    # Q = 1e6 m3/y, S = 1, so Qs = 0.041 x 0.01 x 1e6
+    assert_allclose(grid.at_node["bedload_sediment__volume_outflux"][4], 410.0)
+
+
+def test_implied_depth_and_width():
+    grid, transporter = make_one_node_grid()
+
+    assert_allclose(transporter.calc_implied_depth()[4], 0.0009801)
+    assert_allclose(transporter.calc_implied_width()[4], 83.0)
+    assert_allclose(transporter.calc_implied_width(time_unit="s")[4], 2.61e9)
+
+
+def test_simple_explicit_solver():
+    grid, transporter = make_one_node_grid()
+    transporter.run_one_step(10000.0)
+
+    # dz/dt = -(410 / 1e6) / 0.65 m/y over 1e4 y
+    assert_allclose(grid.at_node["topographic__elevation"][4], 1000.0 - 4100.0 / 650.0)
+
+
+def test_abrasion():
+    grid, transporter = make_one_node_grid(abrasion_coefficient=0.001)
+    transporter.calc_sediment_rate_of_change()
+
+    # E = 0.001 x (410 / 2) / 1000 m/y
+    assert_allclose(
+        grid.at_node["bedload_sediment__rate_of_loss_to_abrasion"][4], 0.000205
+    )
+
+    transporter.run_one_step(1000.0)
+    assert_allclose(
+        grid.at_node["topographic__elevation"][4],
+        1000.0 - 1000.0 * (0.00041 + 0.000205) / 0.65,
+    )
+
+
+def test_matrix_solver_one_node():
+    grid, transporter = make_one_node_grid(solver="matrix")
+    transporter.run_one_step(10000.0)
+
+    # (1 + p f) z' = z, with f = 0.41 and p = 1e4 / (0.65e6)
+    assert_allclose(
+        grid.at_node["topographic__elevation"][4],
+        1000.0 / (1.0 + 0.41 * 1.0e4 / (0.65 * 1.0e6)),
+    )
+
+
+def test_matrix_solver_core_receiver():
+    grid = RasterModelGrid((3, 4), xy_spacing=1000.0)
+    elev = grid.add_zeros("topographic__elevation", at="node")
+    elev[5] = 1.0
+    elev[6] = 2.0
+    grid.set_closed_boundaries_at_grid_edges(True, True, False, True)
+    fa = FlowAccumulator(grid)
+    fa.run_one_step()
+    transporter = GravelRiverTransporter(grid, solver="matrix")
+    transporter.run_one_step(10000.0)
+
+    # Node 6 drains to node 5, which drains to boundary node 4. Build the
+    # same linearized system by hand and solve it independently.
+    s_sixth = 0.001 ** (1.0 / 6.0)
+    f5 = 0.041 * 0.01 * 2.0e6 * s_sixth / 1000.0
+    f6 = 0.041 * 0.01 * 1.0e6 * s_sixth / 1000.0
+    p = 10000.0 / (0.65 * 1.0e6)
+    mat = np.array([[1.0 + p * f5 + p * f6, -p * f6], [-p * f6, 1.0 + p * f6]])
+    expected = np.linalg.solve(mat, np.array([1.0, 2.0]))
+
+    assert_allclose(grid.at_node["topographic__elevation"][[5, 6]], expected)
+
+
+def test_matrix_solver_iterative_branch(monkeypatch):
+    from landlab.components.gravel_river_transporter import gravel_river_transporter
+
+    def run():
+        grid = RasterModelGrid((3, 4), xy_spacing=1000.0)
+        elev = grid.add_zeros("topographic__elevation", at="node")
+        elev[5] = 1.0
+        elev[6] = 2.0
+        grid.set_closed_boundaries_at_grid_edges(True, True, False, True)
+        fa = FlowAccumulator(grid)
+        fa.run_one_step()
+        transporter = GravelRiverTransporter(grid, solver="matrix")
+        transporter.run_one_step(10000.0)
+        return grid, transporter
+
+    grid_direct, _ = run()
+
+    # Drop the size threshold so the preconditioned BiCGStab branch runs
+    # on this small system; it must reproduce the direct solve
+    monkeypatch.setattr(
+        gravel_river_transporter, "_MIN_CORE_NODES_FOR_ITERATIVE_SOLVER", 1
+    )
+    grid_iter, transporter = run()
+
+    # the preconditioner is only ever built inside the iterative branch
+    assert transporter._precond is not None
+    assert_allclose(
+        grid_iter.at_node["topographic__elevation"],
+        grid_direct.at_node["topographic__elevation"],
+        rtol=1.0e-8,
+    )
+
+
+def test_influx_sums_over_donors():
+    grid = RasterModelGrid((3, 5), xy_spacing=1000.0)
+    elev = grid.add_zeros("topographic__elevation", at="node")
+    elev[[6, 7, 8]] = [2.0, 1.0, 2.0]
+    grid.set_closed_boundaries_at_grid_edges(True, True, True, True)
+    grid.status_at_node[2] = grid.BC_NODE_IS_FIXED_VALUE
+    fa = FlowAccumulator(grid)
+    fa.run_one_step()
+    transporter = GravelRiverTransporter(grid)
+    transporter.calc_sediment_rate_of_change()
+
+    # Nodes 6 and 8 both drain to node 7, so its influx is the sum of
+    # their outfluxes
+    assert_allclose(
+        grid.at_node["bedload_sediment__volume_influx"][7],
+        2.0 * 0.041 * 0.01 * 1.0e6 * 0.001 ** (7.0 / 6.0),
+    )
+
+
+def test_abrasion_zero_at_core_pit():
+    def run(dtype):
+        grid = RasterModelGrid((3, 5), xy_spacing=1000.0)
+        elev = grid.add_zeros("topographic__elevation", at="node")
+        elev[[6, 7, 8]] = [2.0, 1.0, 2.0]
+        grid.set_closed_boundaries_at_grid_edges(True, True, True, True)
+        fa = FlowAccumulator(grid)
+        fa.run_one_step()
+        transporter = GravelRiverTransporter(
+            grid, abrasion_coefficient=0.001, dtype=dtype
+        )
+        transporter.run_one_step(100.0)
+        return grid
+
+    grid64 = run(np.float64)
+    grid32 = run(np.float32)
+
+    # Node 7 is its own receiver (a pit), so it has no flow link and loses
+    # nothing to abrasion even though its influx is nonzero
+    assert grid64.at_node["bedload_sediment__volume_influx"][7] > 0.0
+    assert grid64.at_node["bedload_sediment__rate_of_loss_to_abrasion"][7] == 0.0
+
+    # the fused float64 kernel and the vectorized float32 path agree
+    assert_allclose(
+        grid32.at_node["topographic__elevation"],
+        grid64.at_node["topographic__elevation"],
+        rtol=1.0e-6,
+    )
+
+
+def test_float32_fields():
+    grid, transporter = make_one_node_grid(dtype=np.float32)
+    assert grid.at_node["bedload_sediment__volume_outflux"].dtype == np.float32
+
+    transporter.run_one_step(10000.0)
+    assert_allclose(
+        grid.at_node["topographic__elevation"][4],
+        1000.0 - 4100.0 / 650.0,
+        rtol=1.0e-6,
+    )
+
+
+def test_bad_solver_name():
+    grid = RasterModelGrid((3, 3), xy_spacing=1000.0)
+    grid.add_zeros("topographic__elevation", at="node")
+    fa = FlowAccumulator(grid)
+    fa.run_one_step()
+    assert_raises(ValueError, GravelRiverTransporter, grid, solver="nope")
+    assert_raises(
+        ValueError, GravelRiverTransporter, grid, solver="matrix", dtype=np.float32
+    )
+    assert_raises(ValueError, GravelRiverTransporter, grid, device="tpu")